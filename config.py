@@ -7,3 +7,18 @@ load_dotenv()
 # Bot configuration
 TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN', 'JOUW_TELEGRAM_BOT_TOKEN_HIER')
 AUTHORIZED_USER_ID = None  # Wordt automatisch ingesteld bij eerste /start
+
+# Ollama configuratie
+OLLAMA_URL = os.getenv('OLLAMA_URL', 'http://localhost:11434').rstrip('/')
+# Zelfde variabele als de Ollama server: zoveel prompts mogen tegelijk lopen
+OLLAMA_NUM_PARALLEL = int(os.getenv('OLLAMA_NUM_PARALLEL', '4'))
+
+# Webhook (optioneel): zonder WEBHOOK_URL gebruikt Jarvis polling
+WEBHOOK_URL = os.getenv('WEBHOOK_URL')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', '8443'))
+# Verplicht bij webhook: Telegram stuurt dit geheim mee, zodat vervalste updates worden geweigerd
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET')
+# Optioneel: Jarvis doet zelf HTTPS. Zonder deze twee luistert Jarvis op gewone HTTP
+# en is een TLS reverse proxy (443 -> WEBHOOK_PORT) nodig
+WEBHOOK_CERT = os.getenv('WEBHOOK_CERT')
+WEBHOOK_KEY = os.getenv('WEBHOOK_KEY')
@@ -1,28 +1,134 @@
+import asyncio
 import logging
 import sqlite3
 import datetime
-import os
+import io
+import sys
+import queue
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlparse
 from telegram import Update
+from telegram.constants import MessageLimit
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
-from config import TELEGRAM_BOT_TOKEN, AUTHORIZED_USER_ID
+try:
+    import mss  # Optioneel: snellere screenshots
+    from PIL import Image
+except ImportError:
+    mss = None
+from config import TELEGRAM_BOT_TOKEN, AUTHORIZED_USER_ID, WEBHOOK_URL, WEBHOOK_PORT, WEBHOOK_SECRET, WEBHOOK_CERT, WEBHOOK_KEY
 
 # --- CONFIG ---
 TOKEN = TELEGRAM_BOT_TOKEN
 
 # Setup logging naar DB
 db_path = "jarvis_log.db"
-conn = sqlite3.connect(db_path, check_same_thread=False)
+
+def open_db(**kwargs):
+    db = sqlite3.connect(db_path, **kwargs)
+    # WAL: lezers blokkeren de log-writer niet en een commit kost geen dubbele fsync
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.execute("PRAGMA temp_store=MEMORY")
+    db.execute("PRAGMA mmap_size=268435456")
+    db.execute("PRAGMA cache_size=-20000")
+    return db
+
+conn = open_db(check_same_thread=False)
 c = conn.cursor()
 c.execute('''CREATE TABLE IF NOT EXISTS logs 
              (timestamp TEXT, user TEXT, action TEXT, details TEXT)''')
+# Index zodat 'log' (ORDER BY timestamp DESC LIMIT) niet de hele tabel sorteert
+c.execute('''CREATE INDEX IF NOT EXISTS ix_logs_timestamp ON logs (timestamp DESC)''')
 conn.commit()
 
+# Logs gaan via een queue naar één writer-thread die ze in batches wegschrijft,
+# zodat niet elk commando op een eigen commit (fsync) hoeft te wachten.
+log_queue = queue.Queue()
+LOG_BATCH_SIZE = 500
+LOG_WRITE_ATTEMPTS = 3
+
+def log_writer():
+    writer_conn = open_db()
+    while True:
+        batch = [log_queue.get()]
+        try:
+            while len(batch) < LOG_BATCH_SIZE:
+                batch.append(log_queue.get(timeout=0.05))
+        except queue.Empty:
+            pass
+        try:
+            # Bij een fout (bijv. "database is locked") opnieuw proberen; de thread mag nooit stoppen
+            for attempt in range(LOG_WRITE_ATTEMPTS):
+                try:
+                    writer_conn.executemany("INSERT INTO logs VALUES (?, ?, ?, ?)", batch)
+                    writer_conn.commit()
+                    break
+                except sqlite3.Error:
+                    writer_conn.rollback()
+                    if attempt == LOG_WRITE_ATTEMPTS - 1:
+                        raise
+        except Exception:
+            logging.exception("Logs konden niet worden opgeslagen, %d regels overgeslagen", len(batch))
+        finally:
+            for _ in batch:
+                log_queue.task_done()
+
+threading.Thread(target=log_writer, daemon=True).start()
+
 def log_action(user, action, details=""):
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    c.execute("INSERT INTO logs VALUES (?, ?, ?, ?)", (timestamp, str(user), action, details))
-    conn.commit()
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+    log_queue.put((timestamp, str(user), action, details))
+
+# Telegram comprimeert foto's zelf opnieuw; hogere kwaliteit kost alleen uploadtijd
+SCREENSHOT_QUALITY = 75
+
+# pyautogui pas bij eerste gebruik importeren: de import is traag en faalt op headless Linux
+# met KeyError/Xlib-fout. Resultaat (ook None) wordt onthouden.
+pyautogui = None
+pyautogui_checked = False
+
+def load_pyautogui():
+    global pyautogui, pyautogui_checked
+    if not pyautogui_checked:
+        try:
+            import pyautogui as module
+            pyautogui = module
+        except Exception as e:
+            logging.warning("pyautogui niet beschikbaar: %s", e)
+        pyautogui_checked = True
+    return pyautogui
+
+def grab_screenshot():
+    # Screenshot blijft in het geheugen, geen tijdelijk bestand op schijf
+    buf = io.BytesIO()
+    if mss:
+        # mss leest de ruwe BGRA-framebuffer; PIL zet die zonder extra kopie om.
+        # Geen gedeelde mss-instantie: de grab draait in wisselende threads.
+        with mss.mss() as sct:
+            shot = sct.grab(sct.monitors[1])
+        Image.frombuffer("RGB", shot.size, shot.bgra, "raw", "BGRX").save(buf, "JPEG", quality=SCREENSHOT_QUALITY)
+    elif load_pyautogui():
+        pyautogui.screenshot().save(buf, "JPEG", quality=SCREENSHOT_QUALITY)
+    else:
+        raise RuntimeError("installeer mss of pyautogui")
+    buf.seek(0)
+    return buf
 
 # --- Handlers ---
+chat_locks = defaultdict(asyncio.Lock)
+
+async def reply_long(update: Update, text):
+    # Telegram weigert berichten boven MAX_TEXT_LENGTH; delen op volgorde versturen
+    # (parallel versturen kan de volgorde in de chat door elkaar gooien)
+    if not text:
+        # Leeg antwoord (bijv. van het model) toch laten zien, anders komt er niets terug
+        logging.warning("Leeg antwoord voor bericht %r", update.message.text)
+        text = "(leeg antwoord)"
+    for i in range(0, len(text), MessageLimit.MAX_TEXT_LENGTH):
+        await update.message.reply_text(text[i:i + MessageLimit.MAX_TEXT_LENGTH])
+
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     global AUTHORIZED_USER_ID
     user_id = update.effective_user.id
@@ -40,37 +146,60 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
     if AUTHORIZED_USER_ID is None or user_id != AUTHORIZED_USER_ID:
         return
-    
+
+    # Updates worden parallel verwerkt, maar binnen één chat blijft de volgorde behouden
+    async with chat_locks[update.effective_chat.id]:
+        await process_message(update, user_id)
+
+async def process_message(update: Update, user_id):
     text = update.message.text
     log_action(user_id, "command", text)
     
     if text.lower() == "status":
         await update.message.reply_text(f"Jarvis draait sinds {datetime.datetime.now()}\nAlles goed hier.")
     elif text.lower() == "log":
+        # Eerst wachtende logs wegschrijven, zodat ook de nieuwste commando's erbij staan
+        await asyncio.to_thread(log_queue.join)
         c.execute("SELECT timestamp, action, details FROM logs ORDER BY timestamp DESC LIMIT 10")
         rows = c.fetchall()
-        response = "Laatste 10 acties:\n\n"
-        for row in rows:
-            response += f"{row[0]} | {row[1]} | {row[2]}\n"
-        await update.message.reply_text(response)
+        response = "Laatste 10 acties:\n\n" + "\n".join(f"{t} | {a} | {d}" for t, a, d in rows)
+        await reply_long(update, response)
     elif text.lower() == "screenshot":
-        import pyautogui
-        screenshot = pyautogui.screenshot()
-        screenshot.save("temp_screen.png")
-        await update.message.reply_photo(open("temp_screen.png", "rb"))
-        os.remove("temp_screen.png")
+        await update.message.reply_photo(await asyncio.to_thread(grab_screenshot))
         log_action(user_id, "screenshot", "Sent")
     else:
         await update.message.reply_text(f"Commando ontvangen: {text}\nNog niet geïmplementeerd, maar gelogd 😉")
 
 def main():
-    application = Application.builder().token(TOKEN).build()
+    # Zonder geheim kan iedereen die de URL kent nep-updates sturen (met elk user id)
+    if WEBHOOK_URL and not WEBHOOK_SECRET:
+        sys.exit("WEBHOOK_SECRET ontbreekt in .env; webhook-modus start niet zonder geheim.")
+    if bool(WEBHOOK_CERT) != bool(WEBHOOK_KEY):
+        sys.exit("Zet WEBHOOK_CERT en WEBHOOK_KEY allebei (of geen van beide) in .env.")
+
+    # uvloop (optioneel, niet op Windows) maakt de event loop sneller
+    if sys.platform != "win32":
+        try:
+            import uvloop
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        except ImportError:
+            pass
+
+    application = Application.builder().token(TOKEN).concurrent_updates(True).build()
     
     application.add_handler(CommandHandler("start", start))
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
     
     print("Jarvis draait... wacht op commando's")
-    application.run_polling()
+    if WEBHOOK_URL:
+        application.run_webhook(listen="0.0.0.0", port=WEBHOOK_PORT,
+                                url_path=urlparse(WEBHOOK_URL).path.lstrip("/"),
+                                webhook_url=WEBHOOK_URL,
+                                secret_token=WEBHOOK_SECRET,
+                                cert=WEBHOOK_CERT, key=WEBHOOK_KEY)
+    else:
+        application.run_polling()
+    log_queue.join()  # wacht tot alle logs zijn weggeschreven
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
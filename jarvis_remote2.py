@@ -1,61 +1,252 @@
+import asyncio
 import logging
 import sqlite3
 import datetime
+import io
 import os
+import sys
+import queue
+import re
+import shutil
+import threading
+from collections import defaultdict
+from urllib.parse import urlparse
 import subprocess
-import pyautogui
 import time
 from telegram import Update
+from telegram.constants import MessageLimit
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
-import requests
-from config import TELEGRAM_BOT_TOKEN, AUTHORIZED_USER_ID
-def ollama_chat(prompt):
+import httpx
+try:
+    import mss  # Optioneel: snellere screenshots
+    from PIL import Image
+except ImportError:
+    mss = None
+from config import TELEGRAM_BOT_TOKEN, AUTHORIZED_USER_ID, WEBHOOK_URL, WEBHOOK_PORT, WEBHOOK_SECRET, WEBHOOK_CERT, WEBHOOK_KEY, OLLAMA_URL, OLLAMA_NUM_PARALLEL
+
+OLLAMA_MODELS = ["llama3.2", "qwen2.5", "llama2", "dolphin-mistral"]
+OLLAMA_GENERATE_URL = f"{OLLAMA_URL}/api/generate"
+# Eén async client: de event loop blijft vrij terwijl Ollama aan het genereren is.
+# Verbindingen blijven open tussen vragen, zodat niet elke vraag een nieuwe TCP-handshake kost.
+ollama_client = httpx.AsyncClient(timeout=15,
+                                  limits=httpx.Limits(max_connections=OLLAMA_NUM_PARALLEL,
+                                                      max_keepalive_connections=OLLAMA_NUM_PARALLEL,
+                                                      keepalive_expiry=300))
+# Gelijktijdige vragen lopen parallel, maar nooit meer dan Ollama slots heeft
+ollama_slots = asyncio.Semaphore(OLLAMA_NUM_PARALLEL)
+
+# Recente antwoorden: dezelfde vraag binnen ANSWER_TTL seconden gaat niet opnieuw naar Ollama
+ANSWER_TTL = 120
+ANSWER_CACHE_SIZE = 512
+ollama_answers = {}
+
+def cached_answer(prompt):
+    entry = ollama_answers.get(prompt)
+    if entry and entry[0] > time.monotonic():
+        return entry[1]
+    return None
+
+def remember_answer(prompt, answer):
+    ollama_answers.pop(prompt, None)
+    if len(ollama_answers) >= ANSWER_CACHE_SIZE:
+        ollama_answers.pop(next(iter(ollama_answers)))  # Oudste antwoord eruit
+    ollama_answers[prompt] = (time.monotonic() + ANSWER_TTL, answer)
+
+async def ollama_generate(prompt):
     try:
         # Probeer eerst llama3.2, daarna andere modellen
-        models_to_try = ["llama3.2", "qwen2.5", "llama2", "dolphin-mistral"]
-
-        for model in models_to_try:
+        for model in OLLAMA_MODELS:
             try:
-                r = requests.post('http://localhost:11434/api/generate',
-                                 json={
-                                     "model": model,
-                                     "prompt": prompt,
-                                     "stream": False
-                                 }, timeout=15)
+                async with ollama_slots:
+                    r = await ollama_client.post(OLLAMA_GENERATE_URL,
+                                                 json={
+                                                     "model": model,
+                                                     "prompt": prompt,
+                                                     "stream": False
+                                                 })
                 if r.status_code == 200:
-                    return r.json()['response']
-            except:
+                    answer = r.json()['response']
+                    remember_answer(prompt, answer)  # Alleen echte antwoorden, geen foutmeldingen
+                    return answer
+            except httpx.ConnectError:
+                raise  # Server draait niet, andere modellen proberen heeft geen zin
+            except Exception:
                 continue  # Probeer volgende model
 
         return "Geen werkend Ollama model gevonden. Start Ollama en download een model."
 
-    except requests.exceptions.RequestException as e:
+    except httpx.ConnectError as e:
         return f"Ollama server niet bereikbaar. Start Ollama eerst: {str(e)}"
     except Exception as e:
         return f"Ollama fout: {str(e)}"
 
+# Vragen die al onderweg zijn naar Ollama: dezelfde vraag wacht op hetzelfde antwoord
+ollama_inflight = {}
+
+async def ollama_chat(prompt):
+    answer = cached_answer(prompt)
+    if answer is not None:
+        return answer
+
+    task = ollama_inflight.get(prompt)
+    if task is None:
+        task = asyncio.ensure_future(ollama_generate(prompt))
+        ollama_inflight[prompt] = task
+        task.add_done_callback(lambda _: ollama_inflight.pop(prompt, None))
+    # shield: als één wachtende wordt geannuleerd, loopt de vraag voor de anderen door
+    return await asyncio.shield(task)
+
 # --- CONFIG ---
 TOKEN = TELEGRAM_BOT_TOKEN
 
+# Verandert niet tijdens het draaien: één keer opvragen i.p.v. een uname-syscall per 'status'
+HOSTNAME = os.uname().nodename if hasattr(os, 'uname') else os.name
+
+# Cursor pad voor huidige gebruiker
+CURSOR_PATH = r"C:\Users\Ilja\AppData\Local\Programs\cursor\Cursor.exe"
+
+# Windows app mappings
+APP_PATHS = {
+    'chrome': r'C:\Program Files\Google\Chrome\Application\chrome.exe',
+    'firefox': r'C:\Program Files\Mozilla Firefox\firefox.exe',
+    'edge': r'C:\Program Files (x86)\Microsoft\Edge\Application\msedge.exe',
+    'notepad': 'notepad.exe',
+    'calc': 'calc.exe',
+    'explorer': 'explorer.exe',
+    'cmd': 'cmd.exe',
+    'powershell': 'powershell.exe',
+    'code': 'code.cmd',  # VS Code
+    'cursor': CURSOR_PATH,
+    'word': r'C:\Program Files\Microsoft Office\root\Office16\WINWORD.EXE',
+    'excel': r'C:\Program Files\Microsoft Office\root\Office16\EXCEL.EXE',
+    'powerpoint': r'C:\Program Files\Microsoft Office\root\Office16\POWERPNT.EXE',
+}
+
+NEW_PROJECT_COMMANDS = frozenset({"nieuw project", "new project"})
+
+# Gevonden Cursor-pad wordt onthouden; niet gevonden wordt elke keer opnieuw gezocht,
+# zodat Jarvis na het installeren van Cursor niet herstart hoeft te worden
+cursor_exe = None
+
+def find_cursor():
+    global cursor_exe
+    if cursor_exe is None:
+        cursor_exe = CURSOR_PATH if os.path.exists(CURSOR_PATH) else shutil.which("cursor")
+    return cursor_exe
+
 # DB setup
 db_path = "jarvis_log.db"
-conn = sqlite3.connect(db_path, check_same_thread=False)
+
+def open_db(**kwargs):
+    db = sqlite3.connect(db_path, **kwargs)
+    # WAL: lezers blokkeren de log-writer niet en een commit kost geen dubbele fsync
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.execute("PRAGMA temp_store=MEMORY")
+    db.execute("PRAGMA mmap_size=268435456")
+    db.execute("PRAGMA cache_size=-20000")
+    return db
+
+conn = open_db(check_same_thread=False)
 c = conn.cursor()
 c.execute('''CREATE TABLE IF NOT EXISTS logs (timestamp TEXT, user TEXT, action TEXT, details TEXT)''')
 c.execute('''CREATE TABLE IF NOT EXISTS notes (timestamp TEXT, note TEXT)''')
+# Indexen zodat 'log' en 'notes' (ORDER BY timestamp DESC LIMIT) niet de hele tabel sorteren
+c.execute('''CREATE INDEX IF NOT EXISTS ix_logs_timestamp ON logs (timestamp DESC)''')
+c.execute('''CREATE INDEX IF NOT EXISTS ix_notes_timestamp ON notes (timestamp DESC)''')
 conn.commit()
 
+# Logs gaan via een queue naar één writer-thread die ze in batches wegschrijft,
+# zodat niet elk commando op een eigen commit (fsync) hoeft te wachten.
+log_queue = queue.Queue()
+LOG_BATCH_SIZE = 500
+LOG_WRITE_ATTEMPTS = 3
+
+def log_writer():
+    writer_conn = open_db()
+    while True:
+        batch = [log_queue.get()]
+        try:
+            while len(batch) < LOG_BATCH_SIZE:
+                batch.append(log_queue.get(timeout=0.05))
+        except queue.Empty:
+            pass
+        try:
+            # Bij een fout (bijv. "database is locked") opnieuw proberen; de thread mag nooit stoppen
+            for attempt in range(LOG_WRITE_ATTEMPTS):
+                try:
+                    writer_conn.executemany("INSERT INTO logs VALUES (?, ?, ?, ?)", batch)
+                    writer_conn.commit()
+                    break
+                except sqlite3.Error:
+                    writer_conn.rollback()
+                    if attempt == LOG_WRITE_ATTEMPTS - 1:
+                        raise
+        except Exception:
+            logging.exception("Logs konden niet worden opgeslagen, %d regels overgeslagen", len(batch))
+        finally:
+            for _ in batch:
+                log_queue.task_done()
+
+threading.Thread(target=log_writer, daemon=True).start()
+
 def log_action(user, action, details=""):
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    c.execute("INSERT INTO logs VALUES (?, ?, ?, ?)", (timestamp, str(user), action, details))
-    conn.commit()
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+    log_queue.put((timestamp, str(user), action, details))
 
 def add_note(note):
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
     c.execute("INSERT INTO notes VALUES (?, ?)", (timestamp, note))
     conn.commit()
 
+# Telegram comprimeert foto's zelf opnieuw; hogere kwaliteit kost alleen uploadtijd
+SCREENSHOT_QUALITY = 75
+
+# pyautogui pas bij eerste gebruik importeren: de import is traag en faalt op headless Linux
+# met KeyError/Xlib-fout. Resultaat (ook None) wordt onthouden.
+pyautogui = None
+pyautogui_checked = False
+
+def load_pyautogui():
+    global pyautogui, pyautogui_checked
+    if not pyautogui_checked:
+        try:
+            import pyautogui as module
+            pyautogui = module
+        except Exception as e:
+            logging.warning("pyautogui niet beschikbaar: %s", e)
+        pyautogui_checked = True
+    return pyautogui
+
+def grab_screenshot():
+    # Screenshot blijft in het geheugen, geen tijdelijk bestand op schijf
+    buf = io.BytesIO()
+    if mss:
+        # mss leest de ruwe BGRA-framebuffer; PIL zet die zonder extra kopie om.
+        # Geen gedeelde mss-instantie: de grab draait in wisselende threads.
+        with mss.mss() as sct:
+            shot = sct.grab(sct.monitors[1])
+        Image.frombuffer("RGB", shot.size, shot.bgra, "raw", "BGRX").save(buf, "JPEG", quality=SCREENSHOT_QUALITY)
+    elif load_pyautogui():
+        pyautogui.screenshot().save(buf, "JPEG", quality=SCREENSHOT_QUALITY)
+    else:
+        raise RuntimeError("installeer mss of pyautogui")
+    buf.seek(0)
+    return buf
+
 # --- Handlers ---
+chat_locks = defaultdict(asyncio.Lock)
+
+async def reply_long(update: Update, text):
+    # Telegram weigert berichten boven MAX_TEXT_LENGTH; delen op volgorde versturen
+    # (parallel versturen kan de volgorde in de chat door elkaar gooien)
+    if not text:
+        # Leeg antwoord (bijv. van het model) toch laten zien, anders komt er niets terug
+        logging.warning("Leeg antwoord voor bericht %r", update.message.text)
+        text = "(leeg antwoord)"
+    for i in range(0, len(text), MessageLimit.MAX_TEXT_LENGTH):
+        await update.message.reply_text(text[i:i + MessageLimit.MAX_TEXT_LENGTH])
+
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     global AUTHORIZED_USER_ID
     user_id = update.effective_user.id
@@ -74,124 +265,128 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if AUTHORIZED_USER_ID is None or user_id != AUTHORIZED_USER_ID:
         return
 
+    # Updates worden parallel verwerkt, maar binnen één chat blijft de volgorde behouden
+    async with chat_locks[update.effective_chat.id]:
+        await process_message(update, user_id)
+
+async def process_message(update: Update, user_id):
     text = update.message.text.lower().strip()
     log_action(user_id, "command", text)
 
-    # === SLIM ANTWOORD MET OLLAMA ===
-    if text.startswith("ask "):
-        question = text[4:].strip()
-        answer = ollama_chat(f"Beantwoord kort en duidelijk in het Nederlands: {question}")
-        await update.message.reply_text(answer)
-        log_action(user_id, "ollama_ask", question)
+    # Exacte commando's via één dict-lookup, commando's met argument via één regex
+    handler = COMMANDS.get(text)
+    if handler:
+        await handler(update, user_id)
         return
 
-    # === BASIS ===
-    if text == "status":
-        await update.message.reply_text(f"Jarvis draait op {os.uname().nodename if hasattr(os, 'uname') else os.name}\nTijd: {datetime.datetime.now()}")
-    
-    elif text == "log":
-        c.execute("SELECT timestamp, action, details FROM logs ORDER BY timestamp DESC LIMIT 15")
-        rows = c.fetchall()
-        response = "Laatste acties:\n\n"
-        for row in rows:
-            response += f"{row[0]} | {row[1]} | {row[2]}\n"
-        await update.message.reply_text(response or "Nog geen logs.")
-
-    elif text == "screenshot":
-        screenshot_path = "screen.png"
-        try:
-            pyautogui.screenshot(screenshot_path)
-            await update.message.reply_photo(open(screenshot_path, "rb"))
-            os.remove(screenshot_path)
-            log_action(user_id, "screenshot", "Sent")
-        except Exception as e:
-            await update.message.reply_text(f"Fout bij maken screenshot: {e}")
-
-    # === APPS OPENEN ===
-    elif text.startswith("open "):
-        app = text[5:].strip().lower()
-
-        # Windows app mappings
-        app_paths = {
-            'chrome': r'C:\Program Files\Google\Chrome\Application\chrome.exe',
-            'firefox': r'C:\Program Files\Mozilla Firefox\firefox.exe',
-            'edge': r'C:\Program Files (x86)\Microsoft\Edge\Application\msedge.exe',
-            'notepad': 'notepad.exe',
-            'calc': 'calc.exe',
-            'explorer': 'explorer.exe',
-            'cmd': 'cmd.exe',
-            'powershell': 'powershell.exe',
-            'code': 'code.cmd',  # VS Code
-            'cursor': r'C:\Users\Ilja\AppData\Local\Programs\cursor\Cursor.exe',
-            'word': r'C:\Program Files\Microsoft Office\root\Office16\WINWORD.EXE',
-            'excel': r'C:\Program Files\Microsoft Office\root\Office16\EXCEL.EXE',
-            'powerpoint': r'C:\Program Files\Microsoft Office\root\Office16\POWERPNT.EXE',
-        }
+    match = PREFIX_RE.match(text)
+    if match:
+        await PREFIX_COMMANDS[match.group(1)](update, user_id, match.group(2).strip())
+        return
 
-        try:
-            if os.name == 'nt':  # Windows
-                if app in app_paths:
-                    subprocess.Popen([app_paths[app]], shell=True)
-                    await update.message.reply_text(f"✅ {app} geopend.")
-                else:
-                    # Probeer als commando in PATH
-                    subprocess.Popen(app, shell=True)
-                    await update.message.reply_text(f"✅ {app} gestart (als commando).")
-            else:  # Linux/Mac
-                subprocess.Popen(app.split())
-                await update.message.reply_text(f"✅ {app} geopend.")
+    await update.message.reply_text(f"Commando '{text}' ontvangen – nog niet gekend, maar gelogd. Zeg 'help' voor opties.")
 
-            log_action(user_id, "open_app", app)
+# === SLIM ANTWOORD MET OLLAMA ===
+async def cmd_ask(update: Update, user_id, question):
+    answer = await ollama_chat(f"Beantwoord kort en duidelijk in het Nederlands: {question}")
+    await reply_long(update, answer)
+    log_action(user_id, "ollama_ask", question)
 
-        except FileNotFoundError:
-            await update.message.reply_text(f"❌ {app} niet gevonden. Controleer of het geïnstalleerd is.")
-        except Exception as e:
-            await update.message.reply_text(f"❌ Fout bij openen {app}: {str(e)}")
-
-    # Voorbeelden:
-    # open chrome, open notepad, open code, open cursor, open word
-
-    # === NOTITIES ===
-    elif text.startswith("note "):
-        note = text[5:].strip()
-        add_note(note)
-        await update.message.reply_text(f"Notitie opgeslagen: {note}")
-        log_action(user_id, "note", note)
-
-    elif text == "notes":
-        c.execute("SELECT timestamp, note FROM notes ORDER BY timestamp DESC LIMIT 10")
-        rows = c.fetchall()
-        response = "Laatste notities:\n\n"
-        for row in rows:
-            response += f"{row[0]} → {row[1]}\n"
-        await update.message.reply_text(response or "Geen notities nog.")
-
-    # === CURSOR: NIEUW PROJECT ===
-    elif text == "nieuw project" or text == "new project":
-        try:
-            # Cursor pad voor huidige gebruiker
-            cursor_path = r"C:\Users\Ilja\AppData\Local\Programs\cursor\Cursor.exe"
-
-            if os.path.exists(cursor_path):
-                subprocess.Popen([cursor_path])
-                time.sleep(3)
-                # Ctrl+N voor nieuw project
-                pyautogui.hotkey('ctrl', 'n')
-                time.sleep(1)
-                pyautogui.write("nieuw-project-jarvis")
-                pyautogui.press('enter')
-                await update.message.reply_text("✅ Cursor geopend + nieuw project 'nieuw-project-jarvis' gestart.")
-                log_action(user_id, "new_project", "Cursor")
+# === BASIS ===
+async def cmd_status(update: Update, user_id):
+    await update.message.reply_text(f"Jarvis draait op {HOSTNAME}\nTijd: {datetime.datetime.now()}")
+
+async def cmd_log(update: Update, user_id):
+    # Eerst wachtende logs wegschrijven, zodat ook de nieuwste commando's erbij staan
+    await asyncio.to_thread(log_queue.join)
+    c.execute("SELECT timestamp, action, details FROM logs ORDER BY timestamp DESC LIMIT 15")
+    rows = c.fetchall()
+    response = "\n".join(f"{t} | {a} | {d}" for t, a, d in rows)
+    await reply_long(update, f"Laatste acties:\n\n{response}" if rows else "Nog geen logs.")
+
+async def cmd_screenshot(update: Update, user_id):
+    try:
+        await update.message.reply_photo(await asyncio.to_thread(grab_screenshot))
+        log_action(user_id, "screenshot", "Sent")
+    except Exception as e:
+        await update.message.reply_text(f"Fout bij maken screenshot: {e}")
+
+# === APPS OPENEN ===
+# Voorbeelden:
+# open chrome, open notepad, open code, open cursor, open word
+async def cmd_open(update: Update, user_id, app):
+    try:
+        if os.name == 'nt':  # Windows
+            if app in APP_PATHS:
+                # Bekend pad: direct starten, zonder extra cmd.exe ertussen
+                await asyncio.to_thread(subprocess.Popen, [APP_PATHS[app]])
+                await update.message.reply_text(f"✅ {app} geopend.")
             else:
-                await update.message.reply_text("❌ Cursor niet gevonden. Installeer Cursor eerst.")
+                # Probeer als commando in PATH
+                await asyncio.to_thread(subprocess.Popen, app, shell=True)
+                await update.message.reply_text(f"✅ {app} gestart (als commando).")
+        else:  # Linux/Mac
+            await asyncio.to_thread(subprocess.Popen, app.split())
+            await update.message.reply_text(f"✅ {app} geopend.")
 
-        except Exception as e:
-            await update.message.reply_text(f"❌ Fout bij nieuw project: {str(e)}")
+        log_action(user_id, "open_app", app)
 
-    # === OLLAMA INTEGRATIE KOMT HIERONDER ===
+    except FileNotFoundError:
+        await update.message.reply_text(f"❌ {app} niet gevonden. Controleer of het geïnstalleerd is.")
+    except Exception as e:
+        await update.message.reply_text(f"❌ Fout bij openen {app}: {str(e)}")
+
+# === NOTITIES ===
+async def cmd_note(update: Update, user_id, note):
+    add_note(note)
+    await update.message.reply_text(f"Notitie opgeslagen: {note}")
+    log_action(user_id, "note", note)
+
+async def cmd_notes(update: Update, user_id):
+    c.execute("SELECT timestamp, note FROM notes ORDER BY timestamp DESC LIMIT 10")
+    rows = c.fetchall()
+    response = "\n".join(f"{t} → {note}" for t, note in rows)
+    await reply_long(update, f"Laatste notities:\n\n{response}" if rows else "Geen notities nog.")
+
+# === CURSOR: NIEUW PROJECT ===
+async def cmd_new_project(update: Update, user_id):
+    global cursor_exe
+    try:
+        exe = find_cursor()
+        if await asyncio.to_thread(load_pyautogui) is None:
+            await update.message.reply_text("❌ pyautogui is niet beschikbaar.")
+        elif exe:
+            # Blokkerende GUI-acties in een thread, wachten zonder de event loop op te houden
+            await asyncio.to_thread(subprocess.Popen, [exe])
+            await asyncio.sleep(3)
+            # Ctrl+N voor nieuw project
+            await asyncio.to_thread(pyautogui.hotkey, 'ctrl', 'n')
+            await asyncio.sleep(1)
+            await asyncio.to_thread(pyautogui.write, "nieuw-project-jarvis")
+            await asyncio.to_thread(pyautogui.press, 'enter')
+            await update.message.reply_text("✅ Cursor geopend + nieuw project 'nieuw-project-jarvis' gestart.")
+            log_action(user_id, "new_project", "Cursor")
+        else:
+            await update.message.reply_text("❌ Cursor niet gevonden. Installeer Cursor eerst.")
 
-    else:
-        await update.message.reply_text(f"Commando '{text}' ontvangen – nog niet gekend, maar gelogd. Zeg 'help' voor opties.")
+    except Exception as e:
+        cursor_exe = None  # Pad klopt misschien niet meer, volgende keer opnieuw zoeken
+        await update.message.reply_text(f"❌ Fout bij nieuw project: {str(e)}")
+
+COMMANDS = {
+    "status": cmd_status,
+    "log": cmd_log,
+    "screenshot": cmd_screenshot,
+    "notes": cmd_notes,
+    **dict.fromkeys(NEW_PROJECT_COMMANDS, cmd_new_project),
+}
+
+PREFIX_COMMANDS = {
+    "ask": cmd_ask,
+    "open": cmd_open,
+    "note": cmd_note,
+}
+PREFIX_RE = re.compile(r"^(ask|open|note) (.*)$", re.DOTALL)
 
 async def help_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     help_text = """
@@ -228,15 +423,41 @@ Voorbeeld: ask wat is de hoofdstad van Frankrijk?
     """
     await update.message.reply_text(help_text)
 
+async def close_http(application: Application):
+    # Gedeelde Ollama-verbindingen netjes sluiten bij afsluiten
+    await ollama_client.aclose()
+
 def main():
-    application = Application.builder().token(TOKEN).build()
+    # Zonder geheim kan iedereen die de URL kent nep-updates sturen (met elk user id)
+    if WEBHOOK_URL and not WEBHOOK_SECRET:
+        sys.exit("WEBHOOK_SECRET ontbreekt in .env; webhook-modus start niet zonder geheim.")
+    if bool(WEBHOOK_CERT) != bool(WEBHOOK_KEY):
+        sys.exit("Zet WEBHOOK_CERT en WEBHOOK_KEY allebei (of geen van beide) in .env.")
+
+    # uvloop (optioneel, niet op Windows) maakt de event loop sneller
+    if sys.platform != "win32":
+        try:
+            import uvloop
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        except ImportError:
+            pass
+
+    application = Application.builder().token(TOKEN).concurrent_updates(True).post_shutdown(close_http).build()
     
     application.add_handler(CommandHandler("start", start))
     application.add_handler(CommandHandler("help", help_cmd))
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
     
     print("Jarvis draait – wacht op commando's via Telegram")
-    application.run_polling()
+    if WEBHOOK_URL:
+        application.run_webhook(listen="0.0.0.0", port=WEBHOOK_PORT,
+                                url_path=urlparse(WEBHOOK_URL).path.lstrip("/"),
+                                webhook_url=WEBHOOK_URL,
+                                secret_token=WEBHOOK_SECRET,
+                                cert=WEBHOOK_CERT, key=WEBHOOK_KEY)
+    else:
+        application.run_polling()
+    log_queue.join()  # wacht tot alle logs zijn weggeschreven
 
 if __name__ == '__main__':
     main()
\ No newline at end of file